@@ -30,6 +30,9 @@ from parquet.ttypes import (
     Type,
 )
 
+# Bytes read from the end of the file in one go, covering most footers
+FOOTER_PREFETCH_SIZE = 64 * 1024
+
 
 class OffsetRecordingProtocol(TProtocol.TProtocolBase):
     logger = logging.getLogger(__qualname__)
@@ -85,8 +88,18 @@ class OffsetRecordingProtocol(TProtocol.TProtocolBase):
         },
     }
 
+    # Flattened enum_map for a single lookup per field
+    _enum_classes = {
+        (parent_class, field_name): enum_class
+        for parent_class, fields in enum_map.items()
+        for field_name, enum_class in fields.items()
+    }
+
+    _field_info_cache = {}
+
     def __init__(self, trans, name, struct_class):
         super().__init__(trans)
+        self._get_pos = self._get_pos_function(trans)
         self._parents = []
         self._current = {
             "name": name,
@@ -103,7 +116,7 @@ class OffsetRecordingProtocol(TProtocol.TProtocolBase):
 
     def readStructBegin(self):
         ret = super().readStructBegin()
-        self.logger.debug(f"readStructBegin: {ret}")
+        self.logger.debug("readStructBegin: %s", ret)
         if self._current["type"] == "list":
             type_id, (struct_class, spec), required = self._current["spec"]
             assert type_id == TType.STRUCT
@@ -123,7 +136,7 @@ class OffsetRecordingProtocol(TProtocol.TProtocolBase):
 
     def readStructEnd(self):
         ret = super().readStructEnd()
-        self.logger.debug(f"readStructEnd: {ret}")
+        self.logger.debug("readStructEnd: %s", ret)
         self._current["range_to"] = self._get_pos()
         if self._has_parent(lambda p: p["type"] == "list"):
             self._finish_child()
@@ -132,121 +145,118 @@ class OffsetRecordingProtocol(TProtocol.TProtocolBase):
     def readFieldBegin(self):
         assert self._current["type"] == "struct"
         ret = super().readFieldBegin()
-        self.logger.debug(f"readFieldBegin: {ret} (struct: {self._current['name']})")
+        self.logger.debug("readFieldBegin: %s (struct: %s)", ret, self._current["name"])
         _, type_id, field_id = ret
         if field_id > 0:
-            spec = self._current["spec"]
-            field_info = spec[1][field_id]
-            field_id, field_type_id, field_name, field_spec, _ = field_info
-            if field_type_id == TType.STRUCT:
-                type_class = field_spec[0]
-            else:
-                type_class = None
+            field_name, type_name, type_class, field_spec, is_complex = (
+                self._get_field_info(self._current["spec"], field_id)
+            )
             self._new_child(
                 {
                     "name": field_name,
-                    "type": self.type_map[field_type_id],
+                    "type": type_name,
                     "type_class": type_class,
                     "spec": field_spec,
                     "range_from": self._get_pos(),
                     "range_to": None,
-                    "value": [] if self._is_complex_type(field_type_id) else None,
+                    "value": [] if is_complex else None,
                 }
             )
         return ret
 
     def readFieldEnd(self):
         ret = super().readFieldEnd()
-        self.logger.debug(f"readFieldEnd: {ret}")
+        self.logger.debug("readFieldEnd: %s", ret)
         self._current["range_to"] = self._get_pos()
+        self._annotate_enum()
         self._finish_child()
         return ret
 
     def readListBegin(self):
         ret = super().readListBegin()
-        self.logger.debug(f"readListBegin: {ret}")
+        self.logger.debug("readListBegin: %s", ret)
         return ret
 
     def readListEnd(self):
         ret = super().readListEnd()
-        self.logger.debug(f"readListEnd: {ret}")
+        self.logger.debug("readListEnd: %s", ret)
         return ret
 
     def readMapBegin(self):
         ret = super().readMapBegin()
-        self.logger.debug(f"readMapBegin: {ret}")
+        self.logger.debug("readMapBegin: %s", ret)
         return ret
 
     def readMapEnd(self):
         ret = super().readMapEnd()
-        self.logger.debug(f"readMapEnd: {ret}")
+        self.logger.debug("readMapEnd: %s", ret)
         return ret
 
     def readSetBegin(self):
         ret = super().readSetBegin()
-        self.logger.debug(f"readSetBegin: {ret}")
+        self.logger.debug("readSetBegin: %s", ret)
         return ret
 
     def readSetEnd(self):
         ret = super().readSetEnd()
-        self.logger.debug(f"readSetEnd: {ret}")
+        self.logger.debug("readSetEnd: %s", ret)
         return ret
 
     def readMessageBegin(self):
         ret = super().readMessageBegin()
-        self.logger.debug(f"readMessageBegin: {ret}")
+        self.logger.debug("readMessageBegin: %s", ret)
         return ret
 
     def readMessageEnd(self):
         ret = super().readMessageEnd()
-        self.logger.debug(f"readMessageEnd: {ret}")
+        self.logger.debug("readMessageEnd: %s", ret)
         return ret
 
     def readByte(self):
         ret = super().readByte()
-        self.logger.debug(f"readByte: {ret}")
+        self.logger.debug("readByte: %s", ret)
         self._append_value(ret)
         return ret
 
     def readI16(self):
         ret = super().readI16()
-        self.logger.debug(f"readI16: {ret}")
+        self.logger.debug("readI16: %s", ret)
         self._append_value(ret)
         return ret
 
     def readI32(self):
         ret = super().readI32()
-        self.logger.debug(f"readI32: {ret}")
+        self.logger.debug("readI32: %s", ret)
         self._append_value(ret)
         return ret
 
     def readI64(self):
         ret = super().readI64()
-        self.logger.debug(f"readI64: {ret}")
+        self.logger.debug("readI64: %s", ret)
         self._append_value(ret)
         return ret
 
     def readDouble(self):
         ret = super().readDouble()
-        self.logger.debug(f"readDouble: {ret}")
+        self.logger.debug("readDouble: %s", ret)
         self._append_value(ret)
         return ret
 
     def readBool(self):
         ret = super().readBool()
-        self.logger.debug(f"readBool: {ret}")
+        self.logger.debug("readBool: %s", ret)
         self._append_value(ret)
         return ret
 
     def readString(self):
         ret = super().readString()
-        self.logger.debug(f"readString: {ret}")
+        self.logger.debug("readString: %s", ret)
         self._append_value(ret)
         return ret
 
     def readBinary(self):
         ret = super().readBinary()
-        self.logger.debug(f"readBinary: {ret}")
+        self.logger.debug("readBinary: %s", ret)
         if (
             self._current["type"] == "string"
             and self._current["spec"] == "BINARY"
@@ -259,12 +269,39 @@ class OffsetRecordingProtocol(TProtocol.TProtocolBase):
             self._append_value(ret)
         return ret
 
-    def _get_pos(self):
-        if isinstance(self.trans, TMemoryBuffer):
-            return self.trans._buffer.tell()
-        if isinstance(self.trans, TFileTransport):
-            return self.trans.tell()
-        raise RuntimeError(f"unsupported transport: {self.trans}")
+    @staticmethod
+    def _get_pos_function(trans):
+        # Resolved once per protocol since positions are read on every field
+        if isinstance(trans, TMemoryBuffer):
+            return trans._buffer.tell
+        if isinstance(trans, TFileTransport):
+            return trans.tell
+        raise RuntimeError(f"unsupported transport: {trans}")
+
+    def _get_field_info(self, spec, field_id):
+        struct_class, thrift_spec = spec
+        fields = self._field_info_cache.get(struct_class)
+        if fields is None:
+            # Index the thrift spec once per struct class so that field lookups
+            # don't have to unpack and classify the spec entry every time
+            fields = {}
+            for field_info in thrift_spec:
+                if field_info is None:
+                    continue
+                spec_field_id, field_type_id, field_name, field_spec, _ = field_info
+                if field_type_id == TType.STRUCT:
+                    type_class = field_spec[0]
+                else:
+                    type_class = None
+                fields[spec_field_id] = (
+                    field_name,
+                    self.type_map[field_type_id],
+                    type_class,
+                    field_spec,
+                    self._is_complex_type(field_type_id),
+                )
+            self._field_info_cache[struct_class] = fields
+        return fields[field_id]
 
     def _is_complex_type(self, type_id):
         return type_id in {TType.STRUCT, TType.MAP, TType.SET, TType.LIST}
@@ -280,41 +317,40 @@ class OffsetRecordingProtocol(TProtocol.TProtocolBase):
             self._current["value"].append(value)
         else:
             self._current["value"] = value
-        self._annotate_enum()
 
     def _annotate_enum(self):
-        if self._has_parent(
-            lambda p: p["type"] in ("struct", "list")
-            and self._is_enum(p["type_class"], self._current["name"])
-        ):
-            enum_class, name = self._get_enum(
-                self._get_parent()["type_class"], self._current["name"]
-            )
-            self._current["enum_type"] = enum_class.__name__
-            self._current["enum_name"] = name
-
-    def _is_enum(self, parent_class, field_name):
-        return self.enum_map.get(parent_class, {}).get(field_name) is not None
-
-    def _get_enum(self, parent_class, field_name):
-        enum_class = self.enum_map.get(parent_class, {}).get(field_name)
+        # Called once per field when it's complete, rather than on every value
+        # read, so enum lists are mapped to names only once
         value = self._current["value"]
+        if value is None or value == []:
+            return
+        enum_class = self._get_enum_class(
+            self._get_parent()["type_class"], self._current["name"]
+        )
+        if enum_class is None:
+            return
+        self._current["enum_type"] = enum_class.__name__
         if isinstance(value, list):
-            return (enum_class, [enum_class._VALUES_TO_NAMES.get(v) for v in value])
+            self._current["enum_name"] = [
+                enum_class._VALUES_TO_NAMES.get(v) for v in value
+            ]
         else:
-            return (enum_class, enum_class._VALUES_TO_NAMES.get(value))
+            self._current["enum_name"] = enum_class._VALUES_TO_NAMES.get(value)
+
+    def _get_enum_class(self, parent_class, field_name):
+        return self._enum_classes.get((parent_class, field_name))
 
     def _new_child(self, child):
-        self.logger.debug(f"Starting child for {self._current['name']}")
-        self.logger.debug(f"Push: {child}")
+        self.logger.debug("Starting child for %s", self._current["name"])
+        self.logger.debug("Push: %s", child)
         self._parents.append(self._current)
         self._current = child
 
     def _finish_child(self):
-        self.logger.debug(f"Pop: {self._current}")
+        self.logger.debug("Pop: %s", self._current)
         parent = self._parents.pop()
         parent["value"].append(self._current)
-        self.logger.debug(f"Finished child for {parent['name']}")
+        self.logger.debug("Finished child for %s", parent["name"])
         self._current = parent
 
 
@@ -402,8 +438,17 @@ def create_segment_from_offset_info(info, base_offset):
 
 def read_thrift_segment(f, offset, name, thrift_class):
     f.seek(offset)
+    return decode_thrift_segment(TFileTransport(f), offset, name, thrift_class)
+
+
+def read_thrift_segment_from_bytes(data, offset, name, thrift_class):
+    """Decode a Thrift struct that was read into memory from the given offset"""
+    return decode_thrift_segment(TMemoryBuffer(data), offset, name, thrift_class)
+
+
+def decode_thrift_segment(trans, offset, name, thrift_class):
     protocol = OffsetRecordingCompactProtocol(
-        TFileTransport(f),
+        trans,
         name,
         struct_class=thrift_class,
     )
@@ -499,70 +544,81 @@ def fill_gaps(segments, file_size):
     return new_segments
 
 
-def parse_parquet_file(file_path):
+def parse_parquet_file(file):
+    """Parse a Parquet file given its path or a seekable binary file object"""
+    if hasattr(file, "read"):
+        return parse_parquet(file)
+    with open(file, "rb") as f:
+        return parse_parquet(f)
+
+
+def parse_parquet(f):
+    """Parse a Parquet file from a seekable binary file object"""
     segments = []
 
-    with open(file_path, "rb") as f:
-        # Read file header
-        f.seek(0)
-        header = f.read(4)
-        if header != b"PAR1":
-            raise ValueError("Not a valid Parquet file - missing PAR1 header")
-        segments.append(create_segment(0, 4, "magic_number", "PAR1"))
-
-        # Read footer length (last 8 bytes)
-        f.seek(-8, 2)
-        footer_size = f.read(4)
-        footer_magic = f.read(4)
-        file_size = f.tell()
-        if footer_magic != b"PAR1":
-            raise ValueError("Not a valid Parquet file - missing PAR1 footer")
-        footer_size = struct.unpack("<I", footer_size)[0]
-        segments.append(
-            create_segment(file_size - 4, file_size, "magic_number", "PAR1")
-        )
-        segments.append(
-            create_segment(file_size - 8, file_size - 4, "footer_length", footer_size)
-        )
+    # Read file header
+    f.seek(0)
+    header = f.read(4)
+    if header != b"PAR1":
+        raise ValueError("Not a valid Parquet file - missing PAR1 header")
+    segments.append(create_segment(0, 4, "magic_number", "PAR1"))
+
+    # Read the tail of the file, which usually covers the whole footer, so
+    # that the footer length and the footer itself take a single read
+    f.seek(0, 2)
+    file_size = f.tell()
+    if file_size < 12:
+        raise ValueError("Not a valid Parquet file - file too small")
+    tail_size = min(file_size, FOOTER_PREFETCH_SIZE)
+    f.seek(file_size - tail_size)
+    tail = f.read(tail_size)
+    footer_size, footer_magic = struct.unpack("<I4s", tail[-8:])
+    if footer_magic != b"PAR1":
+        raise ValueError("Not a valid Parquet file - missing PAR1 footer")
+    segments.append(create_segment(file_size - 4, file_size, "magic_number", "PAR1"))
+    segments.append(
+        create_segment(file_size - 8, file_size - 4, "footer_length", footer_size)
+    )
 
-        # Parse footer with offset recording
-        footer_offset = file_size - 8 - footer_size
-        footer, footer_segment = read_thrift_segment(
-            f, footer_offset, "footer", FileMetaData
-        )
-        segments.append(footer_segment)
+    # Parse footer with offset recording
+    footer_offset = file_size - 8 - footer_size
+    if footer_offset < 4:
+        raise ValueError("Not a valid Parquet file - invalid footer length")
+    if footer_size + 8 <= tail_size:
+        footer_data = tail[tail_size - 8 - footer_size : tail_size - 8]
+    else:
+        f.seek(footer_offset)
+        footer_data = f.read(footer_size)
+    footer, footer_segment = read_thrift_segment_from_bytes(
+        footer_data, footer_offset, "footer", FileMetaData
+    )
+    segments.append(footer_segment)
 
-        column_chunk_data_offsets = {}
+    column_chunk_data_offsets = {}
 
-        for row_group in footer.row_groups:
-            for column_chunk in row_group.columns:
-                column_key = tuple(column_chunk.meta_data.path_in_schema)
-                offset_list = column_chunk_data_offsets.setdefault(column_key, [])
+    for row_group in footer.row_groups:
+        for column_chunk in row_group.columns:
+            column_key = tuple(column_chunk.meta_data.path_in_schema)
+            offset_list = column_chunk_data_offsets.setdefault(column_key, [])
 
-                offsets = {}
-                offsets["data_pages"] = read_pages(f, column_chunk, segments)
+            offsets = {}
+            offsets["data_pages"] = read_pages(f, column_chunk, segments)
 
-                if column_chunk.meta_data.dictionary_page_offset is not None:
-                    offsets["dictionary_page"] = read_dictionary_page(
-                        f, column_chunk, segments
-                    )
+            if column_chunk.meta_data.dictionary_page_offset is not None:
+                offsets["dictionary_page"] = read_dictionary_page(
+                    f, column_chunk, segments
+                )
 
-                if column_chunk.column_index_offset is not None:
-                    offsets["column_index"] = read_column_index(
-                        f, column_chunk, segments
-                    )
+            if column_chunk.column_index_offset is not None:
+                offsets["column_index"] = read_column_index(f, column_chunk, segments)
 
-                if column_chunk.offset_index_offset is not None:
-                    offsets["offset_index"] = read_offset_index(
-                        f, column_chunk, segments
-                    )
+            if column_chunk.offset_index_offset is not None:
+                offsets["offset_index"] = read_offset_index(f, column_chunk, segments)
 
-                if column_chunk.meta_data.bloom_filter_offset is not None:
-                    offsets["bloom_filter"] = read_bloom_filter(
-                        f, column_chunk, segments
-                    )
+            if column_chunk.meta_data.bloom_filter_offset is not None:
+                offsets["bloom_filter"] = read_bloom_filter(f, column_chunk, segments)
 
-                offset_list.append(offsets)
+            offset_list.append(offsets)
 
     segments.sort(key=lambda s: s["offset"])
     segments = fill_gaps(segments, file_size)
@@ -586,12 +642,22 @@ def segment_to_json(segment):
 
 
 def find_footer_segment(segments):
-    for s in segments:
+    # The footer is right before the footer length and magic number at the end
+    for s in reversed(segments):
         if s["name"] == "footer":
             return s
 
 
-def get_summary(footer, segments):
+def get_thrift_objects(segments):
+    """Convert page headers, indexes and bloom filters to JSON, keyed by offset"""
+    objects = {}
+    for s in segments:
+        if s["name"] in ("page", "column_index", "offset_index", "bloom_filter"):
+            objects[s["offset"]] = segment_to_json(s)
+    return objects
+
+
+def get_summary(footer, segments, thrift_objects):
     summary = {}
     summary["num_rows"] = footer["num_rows"]
     summary["num_row_groups"] = len(footer["row_groups"])
@@ -610,7 +676,7 @@ def get_summary(footer, segments):
         if s["name"] == "page":
             num_pages += 1
             page_header_size += s["length"]
-            page_json = segment_to_json(s)
+            page_json = thrift_objects[s["offset"]]
             if page_json["type"] in ("DATA_PAGE", "DATA_PAGE_V2"):
                 num_data_pages += 1
             elif page_json["type"] == "DICTIONARY_PAGE":
@@ -662,16 +728,12 @@ def get_summary(footer, segments):
     return summary
 
 
-def get_pages(segments, column_chunk_data_offsets):
-    page_offset_map = {}
-    for s in segments:
-        if s["name"] in ("page", "column_index", "offset_index", "bloom_filter"):
-            page_offset_map[s["offset"]] = segment_to_json(s)
+def get_pages(thrift_objects, column_chunk_data_offsets):
     column_pages = []
 
     def with_offset(offset):
         obj = {"$offset": offset}
-        obj.update(page_offset_map[offset])
+        obj.update(thrift_objects[offset])
         return obj
 
     for col_idx, (column_path, offsets) in enumerate(column_chunk_data_offsets.items()):
@@ -714,12 +776,12 @@ def json_encode(x, truncate_length=32):
     raise ValueError(f"cannot encode for json: {type(x)}")
 
 
-def main():
+def run(argv=None):
     parser = argparse.ArgumentParser()
     parser.add_argument("parquet_file")
     parser.add_argument("-s", "--show-offsets-and-thrift-details", action="store_true")
     parser.add_argument("--log-level", default="INFO")
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     logging.basicConfig(
         level=logging.getLevelNamesMapping()[args.log_level.upper()],
@@ -732,12 +794,17 @@ def main():
         output = segments
     else:
         footer = segment_to_json(find_footer_segment(segments))
+        thrift_objects = get_thrift_objects(segments)
         output = {
-            "summary": get_summary(footer, segments),
+            "summary": get_summary(footer, segments, thrift_objects),
             "footer": footer,
-            "pages": get_pages(segments, column_chunk_data_offsets),
+            "pages": get_pages(thrift_objects, column_chunk_data_offsets),
         }
-    print(json.dumps(output, indent=2, default=json_encode))
+    return output
+
+
+def main():
+    print(json.dumps(run(), indent=2, default=json_encode))
 
 
 if __name__ == "__main__":